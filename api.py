@@ -1,9 +1,12 @@
 from fastapi import FastAPI, UploadFile, File, Form, HTTPException
-from fastapi.responses import PlainTextResponse
+from fastapi.responses import PlainTextResponse, StreamingResponse
+import asyncio
+import io
 import shutil
 import os
 import tempfile
 from pathlib import Path
+from PIL import Image
 import converter
 
 app = FastAPI(title="DeepSeek OCR API")
@@ -13,70 +16,144 @@ async def convert_document(
     file: UploadFile = File(...),
     dpi: int = Form(200),
     prompt: str = Form("<|grounding|>Convert the document to markdown."),
-    clean: bool = Form(True)
+    clean: bool = Form(True),
+    workers: int = Form(converter.MAX_CONCURRENCY),
+    stream: bool = Form(False)
 ):
     """
     Convert a PDF or Image file to Markdown.
-    Returns the generated markdown text.
+    Returns the generated markdown text. With `stream`, the markdown is sent
+    as it is produced: page by page for PDFs, paragraph by paragraph for images.
+    Errors after streaming has started are reported as an HTML comment.
+    `workers` pages are OCR'd at once, but never more than
+    DSOCR_MAX_CONCURRENCY across the whole process.
     """
     if not file.filename:
         raise HTTPException(status_code=400, detail="No filename provided")
 
-    # Create a temporary directory for processing
-    with tempfile.TemporaryDirectory() as tmpdir:
-        input_path = os.path.join(tmpdir, file.filename)
-        
-        # Save uploaded file
-        with open(input_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-            
-        results = []
-        
-        try:
-            if file.filename.lower().endswith('.pdf'):
-                # PDF processing
-                try:
-                    pages = converter.pdf_to_images(input_path, dpi=dpi)
-                except Exception as e:
-                    raise HTTPException(status_code=500, detail=f"PDF conversion failed: {str(e)}")
-
-                for i, img in enumerate(pages, start=1):
-                    img_path = os.path.join(tmpdir, f"page_{i}.png")
-                    img.save(img_path, format='PNG')
-                    
-                    try:
-                        out = converter.run_deepseek_for_image(img_path, prompt)
-                        if clean:
-                            out = converter.extract_and_embed_images(out, img_path)
-                            out = converter.clean_text(out)
-                        results.append((i, out))
-                    except Exception as e:
-                        raise HTTPException(status_code=500, detail=f"OCR failed on page {i}: {str(e)}")
-            else:
-                # Image processing
+    suffix = Path(file.filename).suffix
+    is_pdf = suffix.lower() == '.pdf'
+    header = f"<!-- Generated from {file.filename} -->\n\n"
+
+    if not is_pdf:
+        # Images go to ollama straight from memory, no temp file
+        data = await file.read()
+
+        if stream:
+            # Starlette runs this generator in a worker thread; ollama output
+            # is cleaned paragraph by paragraph as it arrives
+            def stream_image():
+                # Same body as the non-streaming response below
+                yield header
                 try:
-                    out = converter.run_deepseek_for_image(input_path, prompt)
-                    if clean:
-                        out = converter.extract_and_embed_images(out, input_path)
-                        out = converter.clean_text(out)
-                    results.append((1, out))
+                    output = converter.iter_stripped(converter.stream_deepseek_for_bytes(data, prompt, suffix))
+                    if not clean:
+                        yield from output
+                        yield "\n\n"
+                        return
+                    with Image.open(io.BytesIO(data)) as img:
+                        emitted = False
+                        for block in converter.iter_clean_blocks(output, img):
+                            emitted = True
+                            yield block
+                    if not emitted:
+                        yield "\n\n"
                 except Exception as e:
-                    raise HTTPException(status_code=500, detail=f"OCR failed on image: {str(e)}")
-
-            # Combine results
-            full_text = f"<!-- Generated from {file.filename} -->\n\n"
-            for i, text in results:
-                if len(results) > 1:
-                    full_text += f"<!-- Page {i} -->\n\n"
-                
-                full_text += text + "\n\n"
-            
-            return full_text
-
-        except HTTPException:
-            raise
+                    yield f"<!-- OCR failed on image: {str(e)} -->\n"
+
+            return StreamingResponse(stream_image(), media_type="text/plain")
+
+        def process_image():
+            out = converter.run_deepseek_for_bytes(data, prompt, suffix)
+            if clean:
+                with Image.open(io.BytesIO(data)) as img:
+                    out = converter.extract_and_embed_images(out, img)
+                # Drop blank lines left by stripped tags, as the streamed body does
+                out = converter.clean_text(out).strip("\n")
+            return out
+
+        # Hashing, cache I/O and the ollama call all block; keep them off the event loop
+        try:
+            out = await asyncio.to_thread(process_image)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"OCR failed on image: {str(e)}")
+
+        return f"{header}{out}\n\n"
+
+    # Stream the PDF to a temp file; poppler reads it by path
+    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as buffer:
+        shutil.copyfileobj(file.file, buffer, length=converter.COPY_BUFSIZE)
+    input_path = buffer.name
+
+    try:
+        try:
+            # Rendering is blocking; keep it off the event loop
+            pages = await asyncio.to_thread(converter.pdf_to_images, input_path, dpi=dpi)
         except Exception as e:
-            raise HTTPException(status_code=500, detail=str(e))
+            raise HTTPException(status_code=500, detail=f"PDF conversion failed: {str(e)}")
+
+        # Bound per-request fan-out; converter also caps ollama calls process-wide
+        limit = asyncio.Semaphore(max(1, workers))
+
+        def process_page(img):
+            out = converter.run_deepseek_for_pil(img, prompt)
+            if clean:
+                out = converter.extract_and_embed_images(out, img)
+                out = converter.clean_text(out)
+            return out
+
+        async def run_page(img):
+            async with limit:
+                return await asyncio.to_thread(process_page, img)
+
+        if stream:
+            async def stream_pages():
+                # Tasks start only once the body is being sent, so a client that
+                # is gone before then never triggers any OCR
+                tasks = [asyncio.create_task(run_page(img)) for img in pages]
+                try:
+                    yield header
+                    for i, task in enumerate(tasks, start=1):
+                        try:
+                            text = await task
+                        except Exception as e:
+                            yield f"<!-- OCR failed on page {i}: {str(e)} -->\n"
+                            return
+                        if len(tasks) > 1:
+                            yield f"<!-- Page {i} -->\n\n"
+                        yield text + "\n\n"
+                finally:
+                    for task in tasks:
+                        task.cancel()
+                        # Pages we stopped waiting for must not log "exception never retrieved"
+                        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+            return StreamingResponse(stream_pages(), media_type="text/plain")
+
+        outs = await asyncio.gather(*[run_page(img) for img in pages], return_exceptions=True)
+        for i, out in enumerate(outs, start=1):
+            if isinstance(out, Exception):
+                raise HTTPException(status_code=500, detail=f"OCR failed on page {i}: {str(out)}")
+        # gather preserves page order
+        results = outs
+
+        # Combine results
+        chunks = [header]
+        for i, text in enumerate(results, start=1):
+            if len(results) > 1:
+                chunks.append(f"<!-- Page {i} -->\n\n")
+            chunks.append(text)
+            chunks.append("\n\n")
+        full_text = "".join(chunks)
+        
+        return full_text
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        os.unlink(input_path)
 
 if __name__ == "__main__":
     import uvicorn
@@ -22,6 +22,8 @@ uploaded_file = st.file_uploader("Choose a PDF or Image file", type=['pdf', 'png
 if uploaded_file is not None:
     st.info(f"File uploaded: {uploaded_file.name}")
     
+    is_pdf = Path(uploaded_file.name).suffix.lower() == '.pdf'
+
     if st.button("Convert"):
         # Create a temporary directory to handle files
         with tempfile.TemporaryDirectory() as tmpdir:
@@ -30,31 +32,27 @@ if uploaded_file is not None:
             with open(input_path, "wb") as f:
                 f.write(uploaded_file.getbuffer())
             
-            results = []
             progress_bar = st.progress(0)
             status_text = st.empty()
             
             try:
-                if uploaded_file.name.lower().endswith('.pdf'):
+                if is_pdf:
                     status_text.text("Converting PDF to images...")
                     pages = converter.pdf_to_images(input_path, dpi=dpi)
                     total_pages = len(pages)
+                    results = [None] * total_pages
                     
                     for i, img in enumerate(pages, start=1):
                         status_text.text(f"Processing page {i}/{total_pages}...")
                         
-                        # Save page image for processing
-                        img_path = os.path.join(tmpdir, f"page_{i}.png")
-                        img.save(img_path, format='PNG')
-                        
-                        # Run OCR
-                        out = converter.run_deepseek_for_image(img_path, prompt)
+                        # Run OCR on the in-memory page
+                        out = converter.run_deepseek_for_pil(img, prompt)
                         
                         if do_clean:
-                            out = converter.extract_and_embed_images(out, img_path)
+                            out = converter.extract_and_embed_images(out, img)
                             out = converter.clean_text(out)
                             
-                        results.append((i, out))
+                        results[i - 1] = out
                         
                         progress_bar.progress(i / total_pages)
                 else:
@@ -66,18 +64,19 @@ if uploaded_file is not None:
                         out = converter.extract_and_embed_images(out, input_path)
                         out = converter.clean_text(out)
                         
-                    results.append((1, out))
+                    results = [out]
                     progress_bar.progress(100)
                 
                 status_text.text("Processing complete!")
                 
                 # Combine results
-                full_text = f"<!-- Generated from {uploaded_file.name} -->\n\n"
-                for i, text in results:
+                chunks = [f"<!-- Generated from {uploaded_file.name} -->\n\n"]
+                for i, text in enumerate(results, start=1):
                     if len(results) > 1:
-                        full_text += f"<!-- Page {i} -->\n\n"
-                    
-                    full_text += text + "\n\n"
+                        chunks.append(f"<!-- Page {i} -->\n\n")
+                    chunks.append(text)
+                    chunks.append("\n\n")
+                full_text = "".join(chunks)
                 
                 # Display result
                 st.subheader("Markdown Output")
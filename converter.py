@@ -1,19 +1,20 @@
 #!/usr/bin/env python3
 """
-Convert a PDF or Image to Markdown using the deepseek-ocr model via the `ollama` CLI.
+Convert a PDF or Image to Markdown using the deepseek-ocr model via ollama.
 
 Requirements:
-- Python packages: pdf2image, Pillow (for PDF support)
+- Python packages: pdf2image, Pillow (for PDF support), ollama
 - System: poppler (for pdf2image)
-- ollama CLI with the `deepseek-ocr` model available locally
+- ollama (server and CLI) with the `deepseek-ocr` model available locally
 
 Example:
     python3 converter.py input.pdf -o output.md
     python3 converter.py input.png -o output.md
 
-The script converts each PDF page to an image (or takes the input image), sends
-it to `ollama run deepseek-ocr`, collects the responses and writes a single
-markdown file.
+The script converts each PDF page to an image (or takes the input image) and
+sends it to deepseek-ocr: PDF pages go from memory through the `ollama` Python
+client, image files through `ollama run deepseek-ocr`. It collects the
+responses and writes a single markdown file.
 """
 
 import argparse
@@ -22,52 +23,162 @@ import sys
 import os
 import tempfile
 import re
-import base64
+import binascii
 import io
+import hashlib
+import threading
+import queue
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from PIL import Image
 
 try:
-    from pdf2image import convert_from_path
+    from pdf2image import convert_from_path, pdfinfo_from_path
 except ImportError:
     convert_from_path = None
+    pdfinfo_from_path = None
 
+try:
+    import ollama
+except ImportError:
+    ollama = None
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        sys.stderr.write(f"Warning: Ignoring invalid {name}={os.environ[name]!r}\n")
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        sys.stderr.write(f"Warning: Ignoring invalid {name}={os.environ[name]!r}\n")
+        return default
+
+
+# Maximum number of concurrent `ollama` invocations across all callers in this
+# process, so parallel page workers don't oversubscribe the model.
+MAX_CONCURRENCY = max(1, _env_int("DSOCR_MAX_CONCURRENCY", 2))
+_ollama_slots = threading.BoundedSemaphore(MAX_CONCURRENCY)
+
+MODEL_NAME = "deepseek-ocr"
+
+_RE_EMBED = re.compile(r"<\|ref\|>(.*?)<\|/ref\|>\s*<\|det\|>\s*\[\[(.*?)\]\]\s*<\|/det\|>", re.DOTALL)
+# <|ref|>...<|/ref|> blocks, <|det|>[[...]]<|/det|> blocks and stray tags, in one pass.
+# Alternatives are tried in order at each position, so the block forms must
+# come before the bare tag form.
+_RE_ALL_TAGS = re.compile(
+    r"<\|ref\|>.*?<\|/ref\|>"
+    r"|<\|det\|>\s*\[\[.*?\]\]\s*<\|/det\|>"
+    r"|<\|/?[A-Za-z0-9_+-]+\|>",
+    re.DOTALL,
+)
+# \( .. \) and \[ .. \] LaTeX delimiters
+_RE_MATH = re.compile(r"\\\((.*?)\\\)|\\\[(.*?)\\\]", re.DOTALL)
+_RE_BLANKS = re.compile(r"\n{2,}")
+# Tags and LaTeX delimiters that iter_clean_blocks keeps together across blank
+# lines. An escaped backslash is its own token, so the LaTeX line break in
+# `\\[4pt]` isn't taken for the start of display math.
+_RE_BLOCK_DELIMS = re.compile(r"\\\\|\\[()\[\]]|<\|/?(?:ref|det)\|>")
+_BLOCK_CLOSERS = {"<|/ref|>": "<|ref|>", "<|/det|>": "<|det|>", "\\)": "\\(", "\\]": "\\["}
+# Streamed text held back for an unclosed delimiter before it is flushed anyway
+_MAX_HELD_CHARS = 64 * 1024
+
+
+# On-disk cache of raw model output keyed on image, prompt and model. Set
+# DSOCR_CACHE to an empty string to disable it. Entries older than the TTL are
+# pruned, and the oldest entries go once the cache exceeds its size cap.
+_cache_env = os.environ.get("DSOCR_CACHE", "~/.cache/deepseek-ocr")
+_cache_dir = Path(_cache_env).expanduser() if _cache_env else None
+_cache_ttl = _env_float("DSOCR_CACHE_TTL", 30 * 24 * 3600)
+_cache_max_bytes = _env_float("DSOCR_CACHE_MAX_MB", 256) * 1024 * 1024
+# Pruning scans the whole directory, so do it at most this often per process
+_CACHE_PRUNE_INTERVAL = 600
+_cache_prune_lock = threading.Lock()
+_cache_last_prune = 0.0
+
+# Small in-process LRU in front of the disk cache for hot pages
+_MEMORY_CACHE_SIZE = 128
+_memory_cache = OrderedDict()
+_memory_cache_lock = threading.Lock()
+
+# Pages rendered per poppler call when pipelining rendering with OCR
+PDF_BATCH_SIZE = 8
+
+# Chunk size for streaming uploads to disk
+COPY_BUFSIZE = 1024 * 1024
 
-def extract_and_embed_images(text: str, image_path: str) -> str:
+# Scratch location for images handed to the ollama CLI; tmpfs when available
+_SCRATCH_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+# Marks the end of output handed over by _stream_in_background's producer
+_STREAM_DONE = object()
+
+
+def extract_and_embed_images(text: str, image) -> str:
     """
     Find <|ref|>image<|/ref|><|det|>[[x1,y1,x2,y2]]<|/det|> tags,
-    crop the image from image_path, convert to base64, and embed as markdown image.
+    crop the region from `image`, convert to base64, and embed as markdown image.
+
+    `image` may be a file path or an already decoded PIL Image (e.g. a PDF page).
+    The image is only decoded if an image region is found, and then only once.
     """
+    if "<|ref|>" not in text:
+        return text
+
+    img = None
+    scale_x = scale_y = 0.0
+
     def replace_match(match):
+        nonlocal img, scale_x, scale_y
         ref_type = match.group(1).strip()
-        coords_str = match.group(2).strip()
+        coords_str = match.group(2)
         
         if ref_type != "image":
             return match.group(0)
             
+        # Parse coordinates; int() tolerates the surrounding whitespace
         try:
-            # Parse coordinates
-            coords = [int(c.strip()) for c in coords_str.split(',')]
-            if len(coords) != 4:
-                return match.group(0)
-                
-            x1, y1, x2, y2 = coords
-            
-            # Crop and convert
-            with Image.open(image_path) as img:
-                width, height = img.size
-                
+            x1, y1, x2, y2 = map(int, coords_str.split(','))
+        except ValueError:
+            return match.group(0)
+
+        try:
+            if img is None:
+                if isinstance(image, Image.Image):
+                    opened = image
+                else:
+                    opened = Image.open(image)
+                    try:
+                        opened.load()
+                    except Exception:
+                        opened.close()
+                        raise
                 # DeepSeek-OCR coordinates are normalized to [0, 1000]
                 # We need to scale them to the actual image dimensions
-                x1 = int(x1 / 1000 * width)
-                y1 = int(y1 / 1000 * height)
-                x2 = int(x2 / 1000 * width)
-                y2 = int(y2 / 1000 * height)
-                
-                cropped = img.crop((x1, y1, x2, y2))
-                buffered = io.BytesIO()
-                cropped.save(buffered, format="PNG")
-                img_b64 = base64.b64encode(buffered.getvalue()).decode("utf-8")
+                width, height = opened.size
+                scale_x = width / 1000.0
+                scale_y = height / 1000.0
+                img = opened
+            
+            x1 = int(x1 * scale_x)
+            y1 = int(y1 * scale_y)
+            x2 = int(x2 * scale_x)
+            y2 = int(y2 * scale_y)
+            
+            # Crop and convert
+            cropped = img.crop((x1, y1, x2, y2))
+            buffered = io.BytesIO()
+            # Fast zlib level: the bytes only live in a data URI, not on disk
+            cropped.save(buffered, format="PNG", compress_level=1, optimize=False)
+            # Encode straight from the buffer's memory instead of a getvalue() copy
+            img_b64 = binascii.b2a_base64(buffered.getbuffer(), newline=False).decode("ascii")
                 
             return f"![image](data:image/png;base64,{img_b64})"
             
@@ -75,47 +186,400 @@ def extract_and_embed_images(text: str, image_path: str) -> str:
             sys.stderr.write(f"Warning: Failed to extract image: {e}\n")
             return match.group(0)
 
-    pattern = r"<\|ref\|>(.*?)<\|/ref\|>\s*<\|det\|>\s*\[\[(.*?)\]\]\s*<\|/det\|>"
-    return re.sub(pattern, replace_match, text, flags=re.DOTALL)
+    # Stitch unchanged slices and replacements together in one join
+    parts = []
+    pos = 0
+    try:
+        for match in _RE_EMBED.finditer(text):
+            parts.append(text[pos:match.start()])
+            parts.append(replace_match(match))
+            pos = match.end()
+    finally:
+        if img is not None and img is not image:
+            img.close()
 
+    if not parts:
+        return text
+    parts.append(text[pos:])
+    return "".join(parts)
 
-def clean_text(s: str) -> str:
-    # Remove <|ref|>...</|ref|> blocks
-    s = re.sub(r"<\|ref\|>.*?<\|/ref\|>", "", s, flags=re.DOTALL)
 
-    # Remove <|det|>[[...]]<|/det|> blocks (coordinates)
-    s = re.sub(r"<\|det\|>\s*\[\[.*?\]\]\s*<\|/det\|>", "", s, flags=re.DOTALL)
+def _replace_math(match) -> str:
+    # Convert nested delimiters too, e.g. \( .. \) inside \[ .. \]
+    if match.group(0)[1] == "(":
+        return f"${_RE_MATH.sub(_replace_math, match.group(1))}$"
+    return f"$${_RE_MATH.sub(_replace_math, match.group(2))}$$"
 
-    # Remove any stray simple tags like <|ref|> or <|/ref|> just in case
-    s = re.sub(r"<\|/?[A-Za-z0-9_+-]+\|>", "", s)
+
+def clean_text(s: str) -> str:
+    # Remove <|ref|>/<|det|> blocks (labels and coordinates) and any stray tags
+    s = _RE_ALL_TAGS.sub("", s)
 
     # Replace LaTeX delimiters: \( .. \) -> $ .. $ and \[ .. \] -> $$ .. $$
-    s = re.sub(r"\\\((.*?)\\\)", r"$\1$", s, flags=re.DOTALL)
-    s = re.sub(r"\\\[(.*?)\\\]", r"$$\1$$", s, flags=re.DOTALL)
+    s = _RE_MATH.sub(_replace_math, s)
 
     # Collapse multiple blank lines into single blank line
-    cleaned = re.sub(r"\n{2,}", "\n\n", s)
+    cleaned = _RE_BLANKS.sub("\n\n", s)
 
     return cleaned
 
 
-def run_deepseek_for_image(image_path: str, prompt: str) -> str:
-    input_arg = f"{image_path}\n{prompt}"
-    cmd = ["ollama", "run", "deepseek-ocr", input_arg]
+def iter_stripped(chunks):
+    """Yield `chunks` with the whitespace around the whole stream removed, like "".join(chunks).strip()."""
+    started = False
+    held = ""
+    for chunk in chunks:
+        if not started:
+            chunk = chunk.lstrip()
+            if not chunk:
+                continue
+            started = True
+        body = chunk.rstrip()
+        if body:
+            yield held + body
+            held = chunk[len(body):]
+        else:
+            held += chunk
+
+
+def _count_open(open_counts: dict, s: str, start: int, end: int):
+    """Add the tags and LaTeX delimiters opened/closed in s[start:end] to `open_counts`."""
+    for match in _RE_BLOCK_DELIMS.finditer(s, start, end):
+        token = match.group()
+        if token in open_counts:
+            open_counts[token] += 1
+        else:
+            opener = _BLOCK_CLOSERS.get(token)
+            # Stray closers (and escaped backslashes) don't change anything
+            if opener is not None and open_counts[opener]:
+                open_counts[opener] -= 1
+
+
+def iter_clean_blocks(chunks, image):
+    """
+    Apply extract_and_embed_images and clean_text to streamed model output,
+    yielding each cleaned paragraph (followed by a blank line) once complete.
+
+    Paragraphs are held back while a tag or LaTeX delimiter is still open, so
+    constructs spanning a blank line are cleaned as a whole. Text left open
+    for more than _MAX_HELD_CHARS is flushed anyway.
+    """
+    pending = ""
+    open_counts = dict.fromkeys(_BLOCK_CLOSERS.values(), 0)
+    # Delimiters in pending[:counted] are in open_counts; pending[:flush_at]
+    # ends at a blank line and can be cleaned on its own
+    counted = flush_at = 0
+    search_from = 0
+    for chunk in chunks:
+        pending += chunk
+        while True:
+            i = pending.find("\n\n", search_from)
+            if i < 0:
+                break
+            _count_open(open_counts, pending, counted, i)
+            counted = search_from = i + 2
+            if not any(open_counts.values()):
+                flush_at = counted
+            elif counted - flush_at > _MAX_HELD_CHARS:
+                flush_at = counted
+                open_counts = dict.fromkeys(open_counts, 0)
+        # A blank line may straddle this chunk and the next
+        search_from = max(search_from, len(pending) - 1)
+        if not flush_at:
+            continue
+
+        head = pending[:flush_at - 2]
+        pending = pending[flush_at:]
+        counted -= flush_at
+        search_from -= flush_at
+        flush_at = 0
+        block = clean_text(extract_and_embed_images(head, image)).strip("\n")
+        if block:
+            yield block + "\n\n"
+
+    block = clean_text(extract_and_embed_images(pending.strip(), image)).strip("\n")
+    if block:
+        yield block + "\n\n"
+
+
+def _cache_key(image_bytes: bytes, prompt: str) -> str:
+    return "-".join((
+        hashlib.sha256(image_bytes).hexdigest(),
+        hashlib.sha256(prompt.encode("utf-8")).hexdigest(),
+        hashlib.sha256(MODEL_NAME.encode("utf-8")).hexdigest()[:16],
+    ))
+
+
+def _cache_get(key: str):
+    with _memory_cache_lock:
+        if key in _memory_cache:
+            _memory_cache.move_to_end(key)
+            return _memory_cache[key]
+
+    if _cache_dir is None:
+        return None
+    path = _cache_dir / f"{key}.md"
     try:
-        proc = subprocess.run(cmd, capture_output=True, text=True, check=True)
-    except FileNotFoundError:
-        raise RuntimeError("`ollama` CLI not found. Install ollama and ensure it's on PATH.")
-    except subprocess.CalledProcessError as e:
-        raise RuntimeError(f"ollama failed (exit {e.returncode}): {e.stderr}\nCommand: {' '.join(cmd)}")
+        if time.time() - path.stat().st_mtime > _cache_ttl:
+            path.unlink()
+            return None
+        value = path.read_text(encoding="utf-8")
+    except OSError:
+        return None
 
-    return proc.stdout.strip()
+    _memory_put(key, value)
+    return value
 
 
-def pdf_to_images(pdf_path: str, dpi: int = 200):
+def _memory_put(key: str, value: str):
+    with _memory_cache_lock:
+        _memory_cache[key] = value
+        _memory_cache.move_to_end(key)
+        while len(_memory_cache) > _MEMORY_CACHE_SIZE:
+            _memory_cache.popitem(last=False)
+
+
+def _cache_put(key: str, value: str):
+    # Empty output is more likely a model hiccup than a blank page; retry next time
+    if not value:
+        return
+    _memory_put(key, value)
+    if _cache_dir is None:
+        return
+    try:
+        _cache_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=_cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(value)
+        os.replace(tmp_path, _cache_dir / f"{key}.md")
+    except OSError as e:
+        sys.stderr.write(f"Warning: Failed to write OCR cache: {e}\n")
+        return
+    _maybe_prune_cache()
+
+
+def _maybe_prune_cache():
+    global _cache_last_prune
+    now = time.time()
+    if now - _cache_last_prune < _CACHE_PRUNE_INTERVAL:
+        return
+    if not _cache_prune_lock.acquire(blocking=False):
+        return
+    try:
+        _cache_last_prune = now
+        _prune_cache(now)
+    finally:
+        _cache_prune_lock.release()
+
+
+def _prune_cache(now: float):
+    """Delete expired entries, then the oldest ones until the cache fits its size cap."""
+    entries = []
+    total = 0
+    for path in _cache_dir.glob("*.md"):
+        try:
+            st = path.stat()
+            if now - st.st_mtime > _cache_ttl:
+                path.unlink()
+                continue
+        except OSError:
+            continue
+        entries.append((st.st_mtime, st.st_size, path))
+        total += st.st_size
+
+    entries.sort()
+    for _, size, path in entries:
+        if total <= _cache_max_bytes:
+            break
+        try:
+            path.unlink()
+        except OSError:
+            continue
+        total -= size
+
+
+def _stream_in_background(parts):
+    """
+    Iterate the generator `parts` on its own thread and yield what it produces.
+
+    The generators below hold an ollama slot until the model is done; running
+    them here means a slow consumer only lets output queue up instead of
+    keeping the slot. If the consumer stops early, `parts` is closed when its
+    next item arrives, which stops ollama.
+    """
+    items = queue.SimpleQueue()
+    stop = threading.Event()
+
+    def produce():
+        try:
+            for part in parts:
+                if stop.is_set():
+                    break
+                items.put(part)
+            items.put(_STREAM_DONE)
+        except Exception as e:
+            items.put(e)
+        finally:
+            parts.close()
+
+    threading.Thread(target=produce, daemon=True).start()
+    try:
+        while True:
+            item = items.get()
+            if item is _STREAM_DONE:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+
+
+def _generate_for_image(image_path: str, prompt: str):
+    with open(image_path, "rb") as f:
+        key = _cache_key(f.read(), prompt)
+    cached = _cache_get(key)
+    if cached is not None:
+        yield cached
+        return
+
+    input_arg = f"{image_path}\n{prompt}"
+    cmd = ["ollama", "run", MODEL_NAME, input_arg]
+    lines = []
+    with _ollama_slots, tempfile.TemporaryFile(mode="w+") as stderr:
+        # stderr goes to a file so a chatty process can't block on a full pipe
+        try:
+            proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=stderr, text=True, bufsize=1)
+        except FileNotFoundError:
+            raise RuntimeError("`ollama` CLI not found. Install ollama and ensure it's on PATH.")
+        with proc:
+            finished = False
+            try:
+                for line in proc.stdout:
+                    lines.append(line)
+                    yield line
+                finished = True
+            finally:
+                # Consumer stopped early; don't leave ollama running
+                if not finished:
+                    proc.kill()
+        if proc.returncode != 0:
+            stderr.seek(0)
+            raise RuntimeError(f"ollama failed (exit {proc.returncode}): {stderr.read()}\nCommand: {' '.join(cmd)}")
+
+    _cache_put(key, "".join(lines).strip())
+
+
+def stream_deepseek_for_image(image_path: str, prompt: str):
+    """
+    Yield deepseek-ocr output for `image_path` line by line as ollama writes it.
+
+    A cached result is yielded in one piece; a completed run is added to the cache.
+    """
+    return _stream_in_background(_generate_for_image(image_path, prompt))
+
+
+def run_deepseek_for_image(image_path: str, prompt: str) -> str:
+    return "".join(_generate_for_image(image_path, prompt)).strip()
+
+
+def _generate_for_bytes(data: bytes, prompt: str, suffix: str):
+    if ollama is None:
+        with tempfile.NamedTemporaryFile(dir=_SCRATCH_DIR, suffix=suffix) as f:
+            f.write(data)
+            f.flush()
+            yield from _generate_for_image(f.name, prompt)
+        return
+
+    key = _cache_key(data, prompt)
+    cached = _cache_get(key)
+    if cached is not None:
+        yield cached
+        return
+
+    parts = []
+    with _ollama_slots:
+        stream = ollama.generate(model=MODEL_NAME, prompt=prompt, images=[data], stream=True)
+        try:
+            while True:
+                try:
+                    part = next(stream)
+                except StopIteration:
+                    break
+                except Exception as e:
+                    raise RuntimeError(f"ollama failed: {e}")
+                parts.append(part["response"])
+                yield part["response"]
+        finally:
+            # Consumer stopped early; drop the HTTP stream
+            stream.close()
+
+    _cache_put(key, "".join(parts).strip())
+
+
+def stream_deepseek_for_bytes(data: bytes, prompt: str, suffix: str = ".jpg"):
+    """
+    Yield deepseek-ocr output for encoded image bytes as ollama generates it.
+
+    Uses the `ollama` Python client when installed, so the image never touches
+    the filesystem. Otherwise the bytes are written to a tmpfs scratch file
+    (named with `suffix` so the CLI recognises it) and handed to the CLI.
+    A cached result is yielded in one piece.
+    """
+    return _stream_in_background(_generate_for_bytes(data, prompt, suffix))
+
+
+def run_deepseek_for_bytes(data: bytes, prompt: str, suffix: str = ".jpg") -> str:
+    return "".join(_generate_for_bytes(data, prompt, suffix)).strip()
+
+
+def run_deepseek_for_pil(img: Image.Image, prompt: str) -> str:
+    """
+    Run deepseek-ocr on an in-memory image (e.g. a PDF page).
+
+    The page is JPEG-encoded, which is much cheaper than PNG, and passed to
+    run_deepseek_for_bytes.
+    """
+    if img.mode not in ("RGB", "L"):
+        img = img.convert("RGB")
+    buffered = io.BytesIO()
+    img.save(buffered, format="JPEG", quality=92, optimize=False)
+    return run_deepseek_for_bytes(buffered.getvalue(), prompt, ".jpg")
+
+
+def _render_pages(pdf_path: str, dpi: int, **kwargs):
     if convert_from_path is None:
         raise ImportError("pdf2image is not installed. Run: pip install pdf2image")
-    return convert_from_path(pdf_path, dpi=dpi)
+    # pdftoppm pipes uncompressed PPM straight into PIL; pdftocairo would make
+    # pdf2image switch to PNG files in a temp folder. Leave half the cores for ollama.
+    return convert_from_path(pdf_path, dpi=dpi,
+                             thread_count=max(2, (os.cpu_count() or 1) // 2), **kwargs)
+
+
+def pdf_to_images(pdf_path: str, dpi: int = 200):
+    return _render_pages(pdf_path, dpi)
+
+
+def pdf_page_count(pdf_path: str) -> int:
+    if pdfinfo_from_path is None:
+        raise ImportError("pdf2image is not installed. Run: pip install pdf2image")
+    return int(pdfinfo_from_path(pdf_path)["Pages"])
+
+
+def iter_pdf_pages(pdf_path: str, dpi: int = 200, batch_size: int = PDF_BATCH_SIZE, page_count: int = None):
+    """
+    Yield PDF pages as PIL Images, rendering `batch_size` pages at a time so
+    OCR on the first pages can start before the whole document is rasterized.
+
+    Each batch is a separate convert_from_path call, which re-runs pdfinfo and
+    the poppler version probe; two short process spawns per batch are small
+    next to rendering `batch_size` pages, but keep batches from getting tiny.
+    """
+    if page_count is None:
+        page_count = pdf_page_count(pdf_path)
+    for first in range(1, page_count + 1, batch_size):
+        last = min(first + batch_size - 1, page_count)
+        yield from _render_pages(pdf_path, dpi, first_page=first, last_page=last)
 
 
 def main():
@@ -124,8 +588,11 @@ def main():
     parser.add_argument("-o", "--output", help="Output markdown file (default: input basename + .md)")
     parser.add_argument("--dpi", type=int, default=200, help="DPI for PDF->image conversion (default: 200)")
     parser.add_argument("--prompt", default="<|grounding|>Convert the document to markdown.",
-                        help="Prompt appended after the image path passed to deepseek-ocr")
+                        help="Prompt sent to deepseek-ocr with each page or image")
     parser.add_argument("--no-clean", action="store_true", help="Disable cleaning of detector tags and coordinates (default: clean enabled)")
+    parser.add_argument("--workers", type=int, default=MAX_CONCURRENCY,
+                        help=f"Number of pages to OCR in parallel (default: {MAX_CONCURRENCY}); "
+                             f"at most DSOCR_MAX_CONCURRENCY={MAX_CONCURRENCY} run at once")
     args = parser.parse_args()
 
     input_path = Path(args.input)
@@ -134,33 +601,53 @@ def main():
         sys.exit(2)
 
     out_path = Path(args.output) if args.output else input_path.with_suffix('.md')
-    results = []
 
     if input_path.suffix.lower() == '.pdf':
-        with tempfile.TemporaryDirectory() as tmpdir:
-            print(f"Converting PDF pages to images (dpi={args.dpi})...")
+        print(f"Converting PDF pages to images (dpi={args.dpi})...")
+        try:
+            page_count = pdf_page_count(str(input_path))
+        except Exception as e:
+            print(f"Failed to convert PDF to images: {e}")
+            print("Ensure poppler is installed and pdf2image is configured.")
+            sys.exit(1)
+
+        # Each worker writes its own slot, so no locking is needed
+        results = [None] * page_count
+
+        def process_page(index, img):
+            out = run_deepseek_for_pil(img, args.prompt)
+            if not args.no_clean:
+                out = extract_and_embed_images(out, img)
+                out = clean_text(out)
+            results[index] = out
+
+        if args.workers > MAX_CONCURRENCY:
+            print(f"Warning: --workers {args.workers} exceeds DSOCR_MAX_CONCURRENCY={MAX_CONCURRENCY}; "
+                  f"at most {MAX_CONCURRENCY} pages are OCR'd at once")
+        print(f"Processing {page_count} pages with {args.workers} worker(s)...")
+        with ThreadPoolExecutor(max_workers=max(1, args.workers)) as ex:
+            # Pages are submitted batch by batch as they are rendered, so
+            # rendering the rest of the document overlaps with OCR
+            futures = []
             try:
-                pages = pdf_to_images(str(input_path), dpi=args.dpi)
+                for index, img in enumerate(iter_pdf_pages(str(input_path), dpi=args.dpi, page_count=page_count)):
+                    futures.append(ex.submit(process_page, index, img))
             except Exception as e:
                 print(f"Failed to convert PDF to images: {e}")
                 print("Ensure poppler is installed and pdf2image is configured.")
+                for f in futures:
+                    f.cancel()
                 sys.exit(1)
 
-            for i, img in enumerate(pages, start=1):
-                img_path = os.path.join(tmpdir, f"page_{i}.png")
-                img.save(img_path, format='PNG')
-                print(f"Processing page {i}/{len(pages)} -> {img_path}")
+            for i, fut in enumerate(futures, start=1):
                 try:
-                    out = run_deepseek_for_image(img_path, args.prompt)
+                    fut.result()
                 except Exception as e:
                     print(f"Error running deepseek-ocr on page {i}: {e}")
+                    for f in futures:
+                        f.cancel()
                     sys.exit(3)
-                
-                if not args.no_clean:
-                    out = extract_and_embed_images(out, img_path)
-                    out = clean_text(out)
-                
-                results.append((i, out))
+                print(f"Processed page {i}/{page_count}")
     else:
         # Assume it is an image
         print(f"Processing image -> {input_path}")
@@ -171,7 +658,7 @@ def main():
                 out = extract_and_embed_images(out, str(input_path))
                 out = clean_text(out)
                 
-            results.append((1, out))
+            results = [out]
         except Exception as e:
             print(f"Error running deepseek-ocr on image: {e}")
             sys.exit(3)
@@ -180,7 +667,7 @@ def main():
     print(f"Writing combined markdown to {out_path}")
     with open(out_path, 'w', encoding='utf-8') as f:
         f.write(f"<!-- Generated by converter.py from {input_path.name} -->\n\n")
-        for i, text in results:
+        for i, text in enumerate(results, start=1):
             if len(results) > 1:
                 f.write(f"<!-- Page {i} -->\n\n")
             f.write(text)
@@ -0,0 +1,78 @@
+import io
+
+import pytest
+from PIL import Image
+
+pytest.importorskip("httpx")
+from fastapi.testclient import TestClient
+
+import api
+import converter
+
+
+RAW_OUTPUTS = [
+    "\n  <|ref|>title<|/ref|><|det|>[[10,10,990,60]]<|/det|>\n# Title\n\n"
+    "Text with \\(x^2\\).\n\n\n<|ref|>image<|/ref|><|det|>[[100,100,600,700]]<|/det|>\n\n"
+    "\\[\na \\\\[4pt]\n\nb\n\\]\n\nEnd.  \n\n",
+    "plain",
+    "   \n",
+]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(converter, "_cache_dir", None)
+    monkeypatch.setattr(converter, "_memory_cache", converter.OrderedDict())
+    return TestClient(api.app)
+
+
+@pytest.fixture
+def png():
+    buffered = io.BytesIO()
+    Image.new("RGB", (200, 150), (200, 30, 30)).save(buffered, format="PNG")
+    return buffered.getvalue()
+
+
+def fake_ollama(monkeypatch, raw):
+    class FakeOllama:
+        @staticmethod
+        def generate(model, prompt, images, stream):
+            for i in range(0, len(raw), 3):
+                yield {"response": raw[i:i + 3]}
+
+    monkeypatch.setattr(converter, "ollama", FakeOllama)
+
+
+def convert(client, png, **form):
+    files = {"file": ("scan.png", png, "image/png")}
+    response = client.post("/convert", files=files, data={k: str(v).lower() for k, v in form.items()})
+    assert response.status_code == 200
+    return response.text
+
+
+@pytest.mark.parametrize("raw", RAW_OUTPUTS)
+@pytest.mark.parametrize("clean", [True, False])
+def test_image_stream_matches_non_stream(client, png, monkeypatch, raw, clean):
+    fake_ollama(monkeypatch, raw)
+
+    streamed = convert(client, png, clean=clean, stream=True)
+    converter._memory_cache.clear()
+    whole = convert(client, png, clean=clean, stream=False)
+
+    assert streamed == whole
+    assert whole.startswith("<!-- Generated from scan.png -->\n\n")
+    assert whole.endswith("\n\n")
+
+
+def test_image_stream_reports_ollama_failure(client, png, monkeypatch):
+    class FailingOllama:
+        @staticmethod
+        def generate(model, prompt, images, stream):
+            yield {"response": "partial"}
+            raise ConnectionError("server went away")
+
+    monkeypatch.setattr(converter, "ollama", FailingOllama)
+
+    body = convert(client, png, stream=True, clean=False)
+
+    assert body.endswith("<!-- OCR failed on image: ollama failed: server went away -->\n")
@@ -0,0 +1,164 @@
+import os
+import sys
+import time
+
+import pytest
+from PIL import Image
+
+import converter
+
+
+SAMPLES = [
+    "<|ref|>title<|/ref|><|det|>[[10, 10, 990, 60]]<|/det|>\n# Report\n\n"
+    "Intro with \\(a+b\\) inline.\n\n\n\n"
+    "<|ref|>image<|/ref|><|det|>[[100,100,500,600]]<|/det|>\n\n"
+    "\\[\nx = \\frac{1}{2}\n\\]\n\nTail paragraph.",
+    "plain text only\n\nsecond paragraph\n",
+    "<|ref|>text<|/ref|><|det|>[[1,2,3,4]]<|/det|>\nA\n\n<|ref|>table<|/ref|><|det|>[[5,6,7,8]]<|/det|>\n\nB",
+]
+
+
+@pytest.fixture
+def page():
+    return Image.new("RGB", (400, 300), (10, 200, 30))
+
+
+def batch_clean(raw, image):
+    return converter.clean_text(converter.extract_and_embed_images(raw.strip(), image)).strip("\n") + "\n\n"
+
+
+def chunked(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+@pytest.mark.parametrize("raw", SAMPLES)
+@pytest.mark.parametrize("size", [1, 3, 17, 10_000])
+def test_iter_clean_blocks_matches_batch(raw, size, page):
+    streamed = "".join(converter.iter_clean_blocks(chunked(raw, size), page))
+    assert streamed == batch_clean(raw, page)
+
+
+def test_iter_clean_blocks_holds_back_open_display_math(page):
+    fed = []
+
+    def chunks():
+        for chunk in ["Before.\n\n\\[\na\n\n", "b\n\\]\n\nAfter."]:
+            fed.append(chunk)
+            yield chunk
+
+    blocks = converter.iter_clean_blocks(chunks(), page)
+
+    assert next(blocks) == "Before.\n\n"
+    # Nothing more may be emitted while \[ is still open across the blank line
+    assert next(blocks) == "$$\na\n\nb\n$$\n\n"
+    assert len(fed) == 2
+    assert list(blocks) == ["After.\n\n"]
+
+
+def test_iter_clean_blocks_ignores_latex_line_break_spacing(page):
+    raw = ("\\(\\begin{aligned} a &= 1 \\\\[4pt] b &= 2 \\end{aligned}\\)\n\n"
+           "Second.\n\nThird.")
+    fed = []
+
+    def chunks():
+        for chunk in chunked(raw, 4):
+            fed.append(chunk)
+            yield chunk
+
+    blocks = converter.iter_clean_blocks(chunks(), page)
+
+    # The first paragraph is out as soon as its blank line has arrived
+    assert next(blocks) == "$\\begin{aligned} a &= 1 \\\\[4pt] b &= 2 \\end{aligned}$\n\n"
+    assert "".join(fed).startswith(raw[:raw.index("Second")])
+    assert "Third" not in "".join(fed)
+    assert list(blocks) == ["Second.\n\n", "Third.\n\n"]
+
+
+def test_iter_clean_blocks_flushes_text_left_open(page, monkeypatch):
+    monkeypatch.setattr(converter, "_MAX_HELD_CHARS", 100)
+    raw = "<|ref|>stray\n\n" + "".join(f"Paragraph {i}.\n\n" for i in range(50))
+
+    blocks = list(converter.iter_clean_blocks(chunked(raw, 4), page))
+
+    assert len(blocks) > 5
+    assert "".join(blocks).endswith("Paragraph 49.\n\n")
+
+
+@pytest.fixture
+def fake_ollama(tmp_path, monkeypatch):
+    """Put an `ollama` shell script with the given body first on PATH; return a page image path."""
+    if sys.platform == "win32":
+        pytest.skip("uses a POSIX shell script as a fake ollama")
+    monkeypatch.setenv("PATH", f"{tmp_path}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setattr(converter, "_cache_dir", None)
+    monkeypatch.setattr(converter, "_memory_cache", converter.OrderedDict())
+    image = tmp_path / "page.png"
+    Image.new("RGB", (8, 8)).save(image)
+
+    def install(body):
+        script = tmp_path / "ollama"
+        script.write_text("#!/bin/sh\n" + body)
+        script.chmod(0o755)
+        return str(image)
+
+    return install
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.02)
+    return True
+
+
+def slots_free():
+    taken = 0
+    try:
+        while taken < converter.MAX_CONCURRENCY and converter._ollama_slots.acquire(timeout=0.1):
+            taken += 1
+        return taken == converter.MAX_CONCURRENCY
+    finally:
+        for _ in range(taken):
+            converter._ollama_slots.release()
+
+
+def process_gone(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return True
+    return False
+
+
+def test_stream_kills_ollama_when_consumer_stops(fake_ollama, tmp_path):
+    pid_file = tmp_path / "pid"
+    image = fake_ollama(f"echo $$ > {pid_file}\nwhile :; do echo line; sleep 0.05; done\n")
+
+    output = converter.stream_deepseek_for_image(image, "prompt")
+    assert next(output) == "line\n"
+    output.close()
+
+    assert wait_until(lambda: process_gone(int(pid_file.read_text())))
+    assert wait_until(slots_free)
+
+
+def test_stream_releases_slot_before_consumer_finishes(fake_ollama):
+    image = fake_ollama("echo one\necho two\necho three\n")
+
+    output = converter.stream_deepseek_for_image(image, "prompt")
+    assert next(output) == "one\n"
+
+    # ollama is done; the unread lines must not keep a slot busy
+    assert wait_until(slots_free)
+    assert list(output) == ["two\n", "three\n"]
+
+
+def test_stream_reports_ollama_failure(fake_ollama):
+    image = fake_ollama("echo partial\necho boom >&2\nexit 1\n")
+
+    output = converter.stream_deepseek_for_image(image, "prompt")
+    assert next(output) == "partial\n"
+    with pytest.raises(RuntimeError, match="boom"):
+        next(output)